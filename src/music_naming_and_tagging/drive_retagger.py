@@ -1,73 +1,468 @@
 from __future__ import annotations
 
+import functools
+import hashlib
+import json
+import mimetypes
 import os
+import random
+import re
+import shutil
 import tempfile
-from typing import Any, Dict
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field, fields, is_dataclass
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, Iterator, TypeVar
 
 import kaiano.logger as log
+from googleapiclient.errors import HttpError
+from googleapiclient.http import MediaFileUpload
 from kaiano.google import GoogleAPI
 from kaiano.mp3.identify import IdentificationPolicy, Mp3Identifier
 from kaiano.mp3.rename import Mp3Renamer
 from kaiano.mp3.tag import Mp3Tagger
 
+# Drive accepts at most 100 calls per batch request; _delete_files splits larger
+# lists into batches of this size.
+_DELETE_BATCH_SIZE = 100
+# Queued source deletes are flushed mid-run once this many are waiting. Several
+# workers can finish together, so the queue may be somewhat longer when drained.
+_DELETE_FLUSH_THRESHOLD = 100
 
-def _print_all_tags(tagger: Mp3Tagger, path: str) -> None:
-    printed = tagger.dump(path)
-    if not printed:
-        return
+# Common audio MIME types encountered in Drive.
+_AUDIO_MIME_TYPES = (
+    "audio/mpeg",  # mp3
+    "audio/mp4",  # m4a/mp4 audio
+    "audio/x-m4a",  # sometimes used for m4a
+    "audio/wav",
+    "audio/x-wav",
+    "audio/flac",
+    "audio/aac",
+    "audio/ogg",
+    "audio/x-aiff",
+    "audio/aiff",
+)
 
-    log.info(f"[FILE] {os.path.basename(path)}")
-    for k in sorted(printed.keys()):
-        v = printed.get(k, "")
-        if v is None:
-            v = ""
-        log.info(f"  [TAG] {k} = {v}")
+# Only these file fields are read downstream; Drive returns far more by default.
+_LIST_FIELDS = (
+    "nextPageToken, files(id, name, mimeType, size, md5Checksum, appProperties)"
+)
+_LIST_PAGE_SIZE = 1000
 
+# Private Drive app property stamped on files this tool has identified and moved;
+# later runs skip them without downloading anything.
+_RETAGGED_PROPERTY = "retagged_mbid"
 
-def _list_music_files(g: GoogleAPI, folder_id: str) -> list[Any]:
-    """List likely-audio files in a Drive folder.
+# Stamped on files updated in place (not identified) with the MD5 of what was
+# written back. While Drive's md5Checksum still matches, the content is exactly
+# what this tool left there and later runs skip it without downloading.
+_CHECKED_MD5_PROPERTY = "retag_checked_md5"
 
-    The new unified Drive facade is intentionally generic; this helper preserves the
-    previous behavior of `drive.list_music_files(...)` in a local, explicit way.
+# Tag names (normalised to lowercase alphanumerics) that hold a MusicBrainz
+# recording MBID in Picard's conventions.
+_RECORDING_MBID_TAGS = frozenset({"musicbrainztrackid", "musicbrainzrecordingid"})
+_MBID_RE = re.compile(r"[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}")
+
+# Metadata fields the renamer reads, and the tag names (music-tag first) that
+# hold them in a tag dump. Used to rename files that skip identification.
+_TAG_METADATA_FIELDS = (
+    ("title", ("tracktitle", "title")),
+    ("artist", ("artist",)),
+    ("album", ("album",)),
+    ("albumartist", ("albumartist",)),
+    ("year", ("year", "date")),
+    ("bpm", ("bpm",)),
+    ("genre", ("genre",)),
+)
+
+# Below this size one multipart request is cheaper than opening a resumable
+# upload session, which costs an extra round-trip per file.
+_SIMPLE_UPLOAD_MAX_BYTES = 5 * 1024 * 1024
+# Chunk size for resumable uploads above that; must be a multiple of 256 KiB.
+_UPLOAD_CHUNK_BYTES = 8 * 1024 * 1024
+
+# tmpfs keeps the download -> tag -> rename -> upload round trip in RAM. Only used
+# when it has room for several workers' files; containers often cap it at 64 MiB.
+_SHM_DIR = "/dev/shm"
+_SHM_MIN_FREE_BYTES = 1024 * 1024 * 1024
+
+# Files processed concurrently. Work is dominated by Drive and lookup latency.
+_DEFAULT_WORKERS = 4
+
+# Concurrent Drive writes (uploads/updates); Drive allows ~10 writes/s per user.
+_DEFAULT_MAX_DRIVE_CONCURRENCY = 2
+
+# Drive answers quota pressure with 429, or with 403 and one of these reasons;
+# other 403s (permissions, storage quota) fail the same way on every attempt.
+_RATE_LIMIT_REASONS = frozenset({"userRateLimitExceeded", "rateLimitExceeded"})
+# Transient server errors. Only retried for idempotent calls: the server may
+# already have applied the request before failing.
+_SERVER_ERROR_STATUSES = frozenset({500, 502, 503, 504})
+
+_thread_state = threading.local()
+
+# AcoustID and MusicBrainz enforce per-client rate limits; identify one file at a
+# time so the identifier's throttling holds across workers (and across runs, since
+# the identifier itself is shared).
+_identify_lock = threading.Lock()
+
+T = TypeVar("T")
+
+
+def _http_error_reasons(e: HttpError) -> set[str]:
+    """Return the ``reason`` codes of a Drive error response."""
+    try:
+        payload = json.loads(e.content)
+        errors = payload["error"]["errors"]
+    except (TypeError, ValueError, KeyError):
+        errors = getattr(e, "error_details", None)
+    if not isinstance(errors, list):
+        return set()
+    return {d["reason"] for d in errors if isinstance(d, dict) and d.get("reason")}
+
+
+def _is_retryable(e: Exception, *, idempotent: bool = True) -> bool:
+    """Whether a failed Drive call is worth repeating.
+
+    Rate-limited requests were rejected before doing anything, so they are safe
+    to repeat even when the call is not idempotent.
     """
+    if not isinstance(e, HttpError):
+        return False
+    status = getattr(e.resp, "status", None)
+    if status == 429:
+        return True
+    if status == 403:
+        return bool(_http_error_reasons(e) & _RATE_LIMIT_REASONS)
+    return idempotent and status in _SERVER_ERROR_STATUSES
+
+
+def _backoff_delay(
+    attempt: int, *, base: float, cap: float, retry_after: Any = None
+) -> float:
+    """Server's Retry-After when given, else exponential backoff; never over ``cap``."""
+    try:
+        return min(cap, max(0.0, float(retry_after)))
+    except (TypeError, ValueError):
+        return min(cap, base * (2**attempt)) + random.uniform(0, 0.25)
+
+
+def _retry(
+    call: Callable[[], T],
+    *,
+    idempotent: bool = True,
+    attempts: int = 6,
+    base: float = 0.5,
+    cap: float = 30.0,
+) -> T:
+    """Run a Drive call, retrying rate-limit and server errors with backoff.
+
+    Sleeps for the server's Retry-After when given, otherwise for an exponential
+    delay, either way at most ``cap`` (plus a little jitter). Pass
+    ``idempotent=False`` for calls such as file creation, where repeating after a
+    5xx could apply the request twice; those only retry rate limiting. Other
+    errors (including 404 for files that are already gone) are raised immediately.
+    """
+    for attempt in range(attempts - 1):
+        try:
+            return call()
+        except HttpError as e:
+            if not _is_retryable(e, idempotent=idempotent):
+                raise
+            delay = _backoff_delay(
+                attempt, base=base, cap=cap, retry_after=e.resp.get("retry-after")
+            )
+            log.info(
+                f"[RETRY] Drive HTTP {e.resp.status}; attempt {attempt + 1}/{attempts}, sleeping {delay:.2f}s"
+            )
+            time.sleep(delay)
+    return call()
 
-    # Common audio MIME types encountered in Drive.
-    mime_types = [
-        "audio/mpeg",  # mp3
-        "audio/mp4",  # m4a/mp4 audio
-        "audio/x-m4a",  # sometimes used for m4a
-        "audio/wav",
-        "audio/x-wav",
-        "audio/flac",
-        "audio/aac",
-        "audio/ogg",
-        "audio/x-aiff",
-        "audio/aiff",
-    ]
 
+@functools.lru_cache(maxsize=4)
+def _get_identifier(
+    acoustid_api_key: str, min_confidence: float, max_candidates: int
+) -> Mp3Identifier:
+    """Build (once per settings tuple) the identifier used by every run.
+
+    Reused across calls so long-lived hosts do not rebuild the AcoustID and
+    MusicBrainz clients on each invocation. Callers serialize access to it through
+    ``_identify_lock``.
+    """
+    policy = IdentificationPolicy(
+        min_confidence=min_confidence,
+        max_candidates=max_candidates,
+        fetch_metadata_min_confidence=min_confidence,
+    )
+    return Mp3Identifier.from_env(acoustid_api_key=acoustid_api_key, policy=policy)
+
+
+@functools.lru_cache(maxsize=1)
+def _get_tagger() -> Mp3Tagger:
+    return Mp3Tagger()
+
+
+@functools.lru_cache(maxsize=1)
+def _get_renamer() -> Mp3Renamer:
+    return Mp3Renamer()
+
+
+def _thread_google_api() -> GoogleAPI:
+    """Return a GoogleAPI client owned by the calling thread.
+
+    The Drive client's httplib2 transport is not thread-safe, so each worker keeps
+    its own instance and reuses it for every file it handles.
+    """
+    g = getattr(_thread_state, "google", None)
+    if g is None:
+        g = GoogleAPI.from_env()
+        _thread_state.google = g
+    return g
+
+
+def _local_filename(name: str) -> str:
+    """Make a Drive file name safe to use as a single local path component.
+
+    Drive names may contain path separators or control characters; those are
+    replaced so the download cannot escape its work directory.
+    """
+    unsafe = {os.sep, os.altsep, "\0"} - {None}
+    cleaned = "".join(
+        "_" if c in unsafe or not c.isprintable() else c for c in name
+    ).strip()
+    if cleaned in ("", ".", ".."):
+        return "download"
+    return cleaned
+
+
+def _format_all_tags(path: str, printed: Dict[str, Any]) -> str:
+    """Render a tag dump previously produced by ``Mp3Tagger.dump``."""
+    lines = [f"[FILE] {os.path.basename(path)}"]
+    for k in sorted(printed):
+        v = printed[k]
+        lines.append(f"  [TAG] {k} = {'' if v is None else v}")
+    return "\n".join(lines)
+
+
+def _written_fields(metadata: Any) -> Dict[str, Any]:
+    """The populated fields of a metadata object handed to ``Mp3Tagger.write``."""
+    if is_dataclass(metadata):
+        items = {f.name: getattr(metadata, f.name) for f in fields(metadata)}
+    else:
+        items = dict(vars(metadata))
+    # ``raw`` carries the provider's whole response, not a tag value.
+    return {k: v for k, v in items.items() if k != "raw" and v not in (None, "")}
+
+
+def _flush_file_log(lines: list[str]) -> None:
+    if lines:
+        log.info("\n".join(lines))
+        lines.clear()
+
+
+def _existing_recording_mbid(tags: Dict[str, Any]) -> str:
+    """Return the recording MBID already present in a tag dump, or ""."""
+    for key, value in tags.items():
+        normalized = re.sub(r"[^a-z0-9]", "", str(key).lower()).removeprefix("txxx")
+        if normalized not in _RECORDING_MBID_TAGS:
+            continue
+        candidate = str(value or "").strip().lower()
+        if _MBID_RE.fullmatch(candidate):
+            return candidate
+    return ""
+
+
+def _metadata_from_tags(tags: Dict[str, Any]) -> SimpleNamespace | None:
+    """Metadata for the renamer built from a tag dump; None without title/artist."""
+    values: Dict[str, Any] = {}
+    for field_name, keys in _TAG_METADATA_FIELDS:
+        values[field_name] = next(
+            (str(tags[k]).strip() for k in keys if str(tags.get(k) or "").strip()),
+            None,
+        )
+    if not (values["title"] and values["artist"]):
+        return None
+    return SimpleNamespace(**values)
+
+
+def _work_root_parent() -> str | None:
+    """Directory for the run's temp files: tmpfs when roomy, else the default."""
+    try:
+        if shutil.disk_usage(_SHM_DIR).free >= _SHM_MIN_FREE_BYTES:
+            return _SHM_DIR
+    except OSError:
+        pass
+    return None
+
+
+def _mime_type_of(f: Any) -> str:
+    return getattr(f, "mime_type", None) or getattr(f, "mimeType", None) or ""
+
+
+def _query_drive_files(service: Any, query: str) -> list[Any]:
+    """Run a paginated files().list query, fetching only the fields we use."""
     files: list[Any] = []
-    seen: set[str] = set()
+    request = service.files().list(
+        q=query,
+        fields=_LIST_FIELDS,
+        pageSize=_LIST_PAGE_SIZE,
+        supportsAllDrives=True,
+        includeItemsFromAllDrives=True,
+    )
+    while request is not None:
+        response = request.execute()
+        files.extend(SimpleNamespace(**f) for f in response.get("files", []))
+        request = service.files().list_next(request, response)
+    return files
 
-    for mt in mime_types:
+
+def _list_by_mime_type(g: GoogleAPI, folder_id: str) -> list[Any]:
+    """Facade listing filtered server-side, deduplicated by file id."""
+    files: list[Any] = []
+    seen: set[str] = set()
+    for mt in _AUDIO_MIME_TYPES:
         for f in g.drive.list_files(parent_id=folder_id, mime_type=mt, trashed=False):
             fid = getattr(f, "id", None)
             if not fid or fid in seen:
                 continue
             seen.add(fid)
             files.append(f)
+    return files
+
+
+def _list_music_files(g: GoogleAPI, folder_id: str) -> list[Any]:
+    """List likely-audio files in a Drive folder.
+
+    The new unified Drive facade is intentionally generic; this helper preserves the
+    previous behavior of `drive.list_music_files(...)` in a local, explicit way.
+    The folder is listed once rather than once per MIME type: with the
+    underlying Drive service exposed, via one OR'd query and a trimmed field
+    list; otherwise via a single facade listing filtered client-side.
+    """
+    service = getattr(g.drive, "_service", None)
+    if service is not None:
+        in_folder = f"'{folder_id}' in parents and trashed = false"
+        any_audio = " or ".join(f"mimeType = '{mt}'" for mt in _AUDIO_MIME_TYPES)
+        files = _query_drive_files(service, f"{in_folder} and ({any_audio})")
+        # Same fallback as the facade path below, at the cost of a second query.
+        if not files:
+            files = _query_drive_files(service, in_folder)
+        return files
+
+    # Facade path: one listing of the folder, filtered here by MIME type when its
+    # items expose one. Otherwise let Drive filter, one query per MIME type.
+    everything = list(g.drive.list_files(parent_id=folder_id, trashed=False))
+    if any(_mime_type_of(f) for f in everything):
+        files = [f for f in everything if _mime_type_of(f) in _AUDIO_MIME_TYPES]
+    else:
+        files = _list_by_mime_type(g, folder_id)
 
     # Fallback: if nothing matched by mime type, return everything in the folder.
     # This mirrors prior behavior where Drive metadata was occasionally inconsistent.
-    if not files:
-        files = g.drive.list_files(parent_id=folder_id, trashed=False)
+    return files or everything
+
+
+def _media_upload(g: GoogleAPI, path: str) -> MediaFileUpload | None:
+    """Return an upload body sized for ``path``, or None to use the facade.
+
+    Small files go up in one non-resumable request; larger ones use a resumable
+    session with large chunks so a typical track needs only a few requests.
+    None means the facade does not expose the underlying Drive service.
+    """
+    if getattr(g.drive, "_service", None) is None:
+        return None
+    mimetype = mimetypes.guess_type(path)[0] or "application/octet-stream"
+    if os.path.getsize(path) < _SIMPLE_UPLOAD_MAX_BYTES:
+        return MediaFileUpload(path, mimetype=mimetype, resumable=False)
+    return MediaFileUpload(
+        path, mimetype=mimetype, resumable=True, chunksize=_UPLOAD_CHUNK_BYTES
+    )
 
-    return files
+
+def _upload_file(
+    g: GoogleAPI,
+    path: str,
+    *,
+    parent_id: str,
+    dest_name: str,
+    app_properties: Dict[str, str] | None = None,
+) -> None:
+    """Upload ``path`` as a new file; ``app_properties`` need the raw service."""
+    media = _media_upload(g, path)
+    if media is None:
+        g.drive.upload_file(path, parent_id=parent_id, dest_name=dest_name)
+        return
+    body: Dict[str, Any] = {"name": dest_name, "parents": [parent_id]}
+    if app_properties:
+        body["appProperties"] = app_properties
+    g.drive._service.files().create(
+        body=body,
+        media_body=media,
+        fields="id",
+        supportsAllDrives=True,
+    ).execute()
+
+
+def _update_file(
+    g: GoogleAPI,
+    file_id: str,
+    path: str,
+    *,
+    app_properties: Dict[str, str] | None = None,
+) -> None:
+    """Replace the content of ``file_id``; ``app_properties`` need the raw service."""
+    media = _media_upload(g, path)
+    if media is None:
+        g.drive.update_file(file_id, path)
+        return
+    g.drive._service.files().update(
+        fileId=file_id,
+        body={"appProperties": app_properties} if app_properties else None,
+        media_body=media,
+        fields="id",
+        supportsAllDrives=True,
+    ).execute()
+
+
+def _patch_file(
+    g: GoogleAPI, file_id: str, body: Dict[str, Any], **params: str
+) -> bool:
+    """Metadata-only update (``params`` e.g. addParents/removeParents).
+
+    Returns False when only the facade is available.
+    """
+    service = getattr(g.drive, "_service", None)
+    if service is None:
+        return False
+    service.files().update(
+        fileId=file_id,
+        body=body,
+        fields="id",
+        supportsAllDrives=True,
+        **params,
+    ).execute()
+    return True
+
+
+def _file_md5(path: str) -> str:
+    digest = hashlib.md5(usedforsecurity=False)
+    with open(path, "rb") as fh:
+        for block in iter(lambda: fh.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _candidate_id(candidate: Any) -> str:
+    return getattr(candidate, "mbid", "") or getattr(candidate, "recording_id", "")
 
 
 def _format_candidate_summary(candidate: Any) -> str:
     confidence = getattr(candidate, "confidence", None)
     confidence_str = f"{confidence:.3f}" if confidence is not None else "N/A"
-    mbid = getattr(candidate, "mbid", "") or getattr(candidate, "recording_id", "")
+    mbid = _candidate_id(candidate)
     title = getattr(candidate, "title", "") or ""
     artist = getattr(candidate, "artist", "") or ""
     parts = []
@@ -95,6 +490,487 @@ def _format_metadata_summary(metadata: Any) -> str:
     return ", ".join(parts)
 
 
+@dataclass(slots=True)
+class _Summary:
+    """Per-run counters; returned to callers as a plain dict."""
+
+    scanned: int = 0
+    downloaded: int = 0
+    identified: int = 0
+    tagged: int = 0
+    uploaded: int = 0
+    failed: int = 0
+    deleted: int = 0
+    skipped: int = 0
+    delete_failed: int = 0
+
+
+@dataclass
+class _RetagRun:
+    """State shared by the workers of one retagging run.
+
+    Counters, phase timings and the pending-delete queue are only touched while
+    holding ``lock``.
+    """
+
+    source_folder_id: str
+    dest_folder_id: str
+    min_confidence: float
+    max_uploads_per_run: int
+    identifier: Mp3Identifier
+    tagger: Mp3Tagger
+    renamer: Mp3Renamer
+    summary: _Summary
+    work_root: str
+    drive_write_slots: threading.Semaphore
+    force_reidentify: bool = False
+    pending_deletes: list[str] = field(default_factory=list)
+    uploads_reserved: int = 0
+    # Nanoseconds spent per phase, summed over workers (busy time, not wall time).
+    timings_ns: Dict[str, int] = field(default_factory=dict)
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+    @contextmanager
+    def timed(self, phase: str) -> Iterator[None]:
+        start = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter_ns() - start
+            with self.lock:
+                self.timings_ns[phase] = self.timings_ns.get(phase, 0) + elapsed
+
+    def format_timings(self) -> str:
+        with self.lock:
+            items = list(self.timings_ns.items())
+        return " ".join(f"t_{phase}={ns / 1e6:.0f}ms" for phase, ns in items)
+
+    def _upload_limit_reached(self) -> bool:
+        limit = self.max_uploads_per_run
+        return bool(limit and limit > 0 and self.uploads_reserved >= limit)
+
+    def upload_budget_exhausted(self) -> bool:
+        with self.lock:
+            return self._upload_limit_reached()
+
+    def reserve_upload(self) -> bool:
+        """Claim one upload from the per-run budget; False once it is used up."""
+        with self.lock:
+            if self._upload_limit_reached():
+                return False
+            self.uploads_reserved += 1
+            return True
+
+    def release_upload(self) -> None:
+        with self.lock:
+            self.uploads_reserved -= 1
+
+    def queue_delete(self, file_id: str) -> int:
+        with self.lock:
+            self.pending_deletes.append(file_id)
+            return len(self.pending_deletes)
+
+    def take_pending_deletes(self, at_least: int = 0) -> list[str]:
+        """Drain the delete queue; leave it untouched while shorter than ``at_least``."""
+        with self.lock:
+            if len(self.pending_deletes) < at_least:
+                return []
+            file_ids = list(self.pending_deletes)
+            self.pending_deletes.clear()
+            return file_ids
+
+
+def _flush_deletes(g: GoogleAPI, file_ids: list[str], run: _RetagRun) -> None:
+    """Delete the given source files, timed as the run's ``delete`` phase."""
+    if not file_ids:
+        return
+
+    with run.timed("delete"):
+        _delete_files(g, file_ids, run)
+
+
+def _delete_files(g: GoogleAPI, file_ids: list[str], run: _RetagRun) -> None:
+    """Delete source files through the facade.
+
+    When the facade exposes the underlying Drive service the deletes are sent as
+    HTTP batch requests of at most ``_DELETE_BATCH_SIZE`` calls, and items rejected
+    by rate limiting are resent in a new batch after a backoff; otherwise they
+    fall back to one call per file.
+    """
+    service = getattr(g.drive, "_service", None)
+    if service is None or not hasattr(service, "new_batch_http_request"):
+        for fid in file_ids:
+            try:
+                _retry(lambda: g.drive.delete_file(fid))
+                with run.lock:
+                    run.summary.deleted += 1
+                log.info(f"[DELETE] Deleted source file_id={fid}")
+            except Exception as e:
+                with run.lock:
+                    run.summary.delete_failed += 1
+                log.error(f"[DELETE] Failed to delete source file_id={fid}: {e}")
+        return
+
+    for start in range(0, len(file_ids), _DELETE_BATCH_SIZE):
+        _delete_batch(service, file_ids[start : start + _DELETE_BATCH_SIZE], run)
+
+
+def _delete_batch(service: Any, file_ids: list[str], run: _RetagRun) -> None:
+    """Delete up to ``_DELETE_BATCH_SIZE`` files, resending rate-limited items."""
+    pending = list(file_ids)
+    attempts = 6
+    for attempt in range(attempts):
+        # Drive counts every item of a batch against the per-user write quota, so
+        # single items can be rate limited even when the batch call succeeds.
+        throttled: list[str] = []
+        last_attempt = attempt == attempts - 1
+
+        def _on_delete(request_id: str, response: Any, exception: Exception) -> None:
+            if exception is not None:
+                if not last_attempt and _is_retryable(exception):
+                    throttled.append(request_id)
+                    return
+                with run.lock:
+                    run.summary.delete_failed += 1
+                log.error(
+                    f"[DELETE] Failed to delete source file_id={request_id}: {exception}"
+                )
+                return
+            with run.lock:
+                run.summary.deleted += 1
+            log.info(f"[DELETE] Deleted source file_id={request_id}")
+
+        batch = service.new_batch_http_request(callback=_on_delete)
+        for fid in pending:
+            batch.add(
+                service.files().delete(fileId=fid, supportsAllDrives=True),
+                request_id=fid,
+            )
+        try:
+            _retry(batch.execute)
+        except Exception as e:
+            with run.lock:
+                run.summary.delete_failed += len(pending)
+            log.error(f"[DELETE] Batch delete of {len(pending)} files failed: {e}")
+            return
+
+        if not throttled:
+            return
+        pending = throttled
+        delay = _backoff_delay(attempt, base=0.5, cap=30.0)
+        log.info(
+            f"[RETRY] {len(pending)} deletes rate limited; attempt {attempt + 1}/{attempts}, sleeping {delay:.2f}s"
+        )
+        time.sleep(delay)
+
+
+def _settle_pretagged(
+    g: GoogleAPI,
+    run: _RetagRun,
+    file_id: str,
+    name: str,
+    temp_path: str,
+    mbid: str,
+    tags: Dict[str, Any],
+    note: Callable[[str], None],
+) -> None:
+    """Mark (and move/rename) a file whose tags already name its recording.
+
+    Needs the raw Drive service (metadata-only updates and parent moves are not
+    available through the facade). Its content is not changed, so nothing is uploaded or deleted: the Drive file
+    gets the ``retagged_mbid`` marker, a name from its tags, and new parents in
+    one metadata-only update. No upload budget is used.
+    """
+    body: Dict[str, Any] = {"appProperties": {_RETAGGED_PROPERTY: mbid}}
+    metadata = _metadata_from_tags(tags)
+    if metadata is not None:
+        try:
+            with run.timed("rename"):
+                new_name = run.renamer.apply(temp_path, metadata=metadata).dest_name
+        except Exception as e:
+            note(f"[RENAME] Could not derive a name from tags ({e}); keeping {name}")
+        else:
+            if new_name and new_name != name:
+                body["name"] = new_name
+                note(f"[RENAME] {name} -> {new_name}")
+
+    params: Dict[str, str] = {}
+    if run.dest_folder_id != run.source_folder_id:
+        params = {
+            "addParents": run.dest_folder_id,
+            "removeParents": run.source_folder_id,
+        }
+    with run.drive_write_slots, run.timed("upload"):
+        _retry(lambda: _patch_file(g, file_id, body, **params))
+    with run.lock:
+        run.summary.identified += 1
+    note(
+        f"[DECISION] {'move_to_dest' if params else 'mark_in_place'} mbid={mbid} "
+        f"dest_folder_id={run.dest_folder_id} (metadata-only, no upload)"
+    )
+
+
+def _process_one(run: _RetagRun, file: Any) -> None:
+    """Download, identify, tag, rename and re-upload a single Drive file."""
+    tagger = run.tagger
+
+    with run.lock:
+        run.summary.scanned += 1
+    file_id = getattr(file, "id", None)
+    name = getattr(file, "name", "unknown")
+
+    if not file_id:
+        log.info(f"[SKIP] Missing file id for {name!r}; skipping.")
+        return
+
+    app_properties = getattr(file, "appProperties", None) or {}
+    if app_properties.get(_RETAGGED_PROPERTY):
+        with run.lock:
+            run.summary.skipped += 1
+        log.info(
+            f"[SKIP] {name} ({file_id}) already retagged "
+            f"mbid={app_properties[_RETAGGED_PROPERTY]}; skipping."
+        )
+        return
+
+    checked_md5 = app_properties.get(_CHECKED_MD5_PROPERTY)
+    if (
+        not run.force_reidentify
+        and checked_md5
+        and checked_md5 == getattr(file, "md5Checksum", None)
+    ):
+        with run.lock:
+            run.summary.skipped += 1
+        log.info(
+            f"[SKIP] {name} ({file_id}) unchanged since it was last checked; skipping."
+        )
+        return
+
+    # Named in the error log so a failure can be traced to its step.
+    phase = "setup"
+    work_dir: str | None = None
+    # A file's progress lines are emitted as one record when it finishes, so
+    # concurrent workers don't interleave and the logging lock is taken once.
+    lines: list[str] = []
+    note = lines.append
+    try:
+        g = _thread_google_api()
+        # One directory per file: the renamer derives names from metadata, so two
+        # workers holding the same track must not rename into the same folder.
+        work_dir = tempfile.mkdtemp(prefix=f"{file_id}_", dir=run.work_root)
+        temp_path = os.path.join(work_dir, _local_filename(name))
+
+        phase = "download"
+        note(f"[DOWNLOAD] {name} ({file_id}) -> {temp_path}")
+        with run.timed("download"):
+            _retry(lambda: g.drive.download_file(file_id, temp_path))
+        with run.lock:
+            run.summary.downloaded += 1
+
+        # Print existing tags (parsed once; later steps reuse this dump). This is
+        # diagnostic only, so an unreadable tag block must not fail the file.
+        try:
+            with run.timed("read_tags"):
+                existing_tags = tagger.dump(temp_path) or {}
+        except Exception as e:
+            log.error(f"[PRE-EXISTING-TAGS] Could not read tags of {name}: {e}")
+            existing_tags = {}
+        note("[PRE-EXISTING-TAGS]------------------")
+        if existing_tags:
+            note(_format_all_tags(temp_path, existing_tags))
+
+        # Identify, unless the file already carries a recording MBID: then the
+        # fingerprint + AcoustID + MusicBrainz round-trip would only confirm it.
+        # Settling such a file needs a metadata-only update, so on the facade-only
+        # path it goes through identify/tag/upload like any other file.
+        phase = "identify"
+        existing_mbid = ""
+        if not run.force_reidentify and getattr(g.drive, "_service", None) is not None:
+            existing_mbid = _existing_recording_mbid(existing_tags)
+        if existing_mbid:
+            note(f"[SKIP-IDENTIFY] already tagged mbid={existing_mbid}")
+            phase = "move"
+            _settle_pretagged(
+                g, run, file_id, name, temp_path, existing_mbid, existing_tags, note
+            )
+            return
+
+        with _identify_lock, run.timed("identify"):
+            id_result = run.identifier.identify(temp_path, fetch_metadata=True)
+
+        # Log identification summary
+        candidates = getattr(id_result, "candidates", [])
+        num_candidates = len(candidates) if candidates else 0
+        chosen = getattr(id_result, "chosen", None)
+        chosen_summary = _format_candidate_summary(chosen) if chosen else "None"
+        metadata_present = bool(getattr(id_result, "metadata", None))
+        note(
+            f"[IDENTIFY] candidates={num_candidates}, chosen=({chosen_summary}), metadata_fetched={metadata_present}"
+        )
+
+        chosen_conf = (
+            float(getattr(chosen, "confidence", 0.0)) if chosen is not None else 0.0
+        )
+        identified = chosen is not None and chosen_conf >= run.min_confidence
+
+        # Tag + rename only when we have metadata (metadata fetch is policy-gated)
+        path_out = temp_path
+        # The Drive name, not the sanitised local one: separators are only unsafe
+        # on disk, and a file that is not renamed keeps its name.
+        desired_filename = name
+
+        if id_result.metadata:
+            phase = "tag"
+            metadata_summary = _format_metadata_summary(id_result.metadata)
+            note(
+                f"[TAGGING] confidence={chosen_conf:.3f}, metadata=({metadata_summary})"
+            )
+            with run.timed("tag"):
+                tagger.write(path_out, id_result.metadata, ensure_virtualdj_compat=True)
+            # Logged from the values just written rather than by re-parsing the
+            # file, which would double the tag I/O per track.
+            note("[TAGGING-DONE]")
+            note("[NEW-TAGS]------------------")
+            note(_format_all_tags(path_out, _written_fields(id_result.metadata)))
+            with run.lock:
+                run.summary.tagged += 1
+
+            # Rename in-place (local path only)
+            phase = "rename"
+            with run.timed("rename"):
+                rename_result = run.renamer.apply(path_out, metadata=id_result.metadata)
+            old_basename = os.path.basename(path_out)
+            path_out = rename_result.dest_path
+            desired_filename = rename_result.dest_name
+            new_basename = os.path.basename(path_out)
+            note(f"[RENAME] {old_basename} -> {new_basename}")
+
+        phase = "upload"
+        if not identified and not id_result.metadata:
+            # Nothing was written locally, so re-uploading would send Drive the
+            # bytes it already has. Only remember that this content was checked.
+            md5 = getattr(file, "md5Checksum", None) or _file_md5(path_out)
+            with run.drive_write_slots:
+                marked = _retry(
+                    lambda: _patch_file(
+                        g, file_id, {"appProperties": {_CHECKED_MD5_PROPERTY: md5}}
+                    )
+                )
+            note(
+                f"[UNCHANGED] {name} ({file_id}) left as is "
+                f"(chosen_conf={chosen_conf:.3f}, marked_checked={marked})"
+            )
+            return
+
+        if not run.reserve_upload():
+            note(
+                f"[STOP] Reached max uploads per run ({run.max_uploads_per_run}); "
+                f"leaving {name} ({file_id}) untouched."
+            )
+            return
+
+        if not identified:
+            # Update-in-place scenarios: no candidates or low confidence
+            if chosen is None:
+                reason = "no_candidates"
+            else:
+                reason = f"low_confidence:{chosen_conf:.3f}"
+
+            note(
+                f"[DECISION] update_in_place reason={reason} chosen_conf={chosen_conf:.3f}"
+            )
+            try:
+                checked = {_CHECKED_MD5_PROPERTY: _file_md5(path_out)}
+                with run.drive_write_slots, run.timed("upload"):
+                    _retry(
+                        lambda: _update_file(
+                            g, file_id, path_out, app_properties=checked
+                        )
+                    )
+            except Exception:
+                run.release_upload()
+                raise
+            with run.lock:
+                run.summary.uploaded += 1
+            note(
+                f"[UPLOAD-SOURCE] Updated in place file_id={file_id} ({name}) reason={reason}"
+            )
+            return
+
+        with run.lock:
+            run.summary.identified += 1
+
+        # Identified with sufficient confidence: upload to destination and delete original.
+        note(
+            f"[DECISION] move_to_dest chosen_conf={chosen_conf:.3f} dest_folder_id={run.dest_folder_id}"
+        )
+        try:
+            with run.drive_write_slots, run.timed("upload"):
+                # A new file: a 5xx may come back after it was created, so only
+                # rate limiting is retried to avoid duplicates in the destination.
+                _retry(
+                    lambda: _upload_file(
+                        g,
+                        path_out,
+                        parent_id=run.dest_folder_id,
+                        dest_name=desired_filename,
+                        app_properties={
+                            _RETAGGED_PROPERTY: _candidate_id(chosen) or "unknown"
+                        },
+                    ),
+                    idempotent=False,
+                )
+        except Exception:
+            run.release_upload()
+            raise
+        with run.lock:
+            run.summary.uploaded += 1
+        note(f"[UPLOAD] {desired_filename} -> dest_folder_id={run.dest_folder_id}")
+
+        run.queue_delete(file_id)
+        note(f"[DELETE-QUEUED] file_id={file_id} ({name})")
+
+    except Exception as e:
+        with run.lock:
+            run.summary.failed += 1
+        _flush_file_log(lines)
+        log.error(f"[ERROR] {name} ({file_id}) phase={phase}: {e}", exc_info=True)
+    finally:
+        _flush_file_log(lines)
+        # Best-effort cleanup; also removes the renamed output if there is one.
+        if work_dir is not None:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def _run_pool(
+    g: GoogleAPI, run: _RetagRun, music_files: list[Any], workers: int
+) -> None:
+    """Feed files to a pool of ``workers`` threads, flushing deletes as they queue."""
+    remaining = iter(music_files)
+    in_flight: set[Future[None]] = set()
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="retag") as pool:
+        while True:
+            # Keep at most `workers` files in flight so the upload budget is not
+            # overshot by files that were downloaded but can no longer be uploaded.
+            while len(in_flight) < workers:
+                if run.upload_budget_exhausted():
+                    break
+                file = next(remaining, None)
+                if file is None:
+                    break
+                in_flight.add(pool.submit(_process_one, run, file))
+
+            if not in_flight:
+                break
+
+            done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                future.result()
+
+            # Deletes are flushed from this thread only, using its own client.
+            _flush_deletes(g, run.take_pending_deletes(_DELETE_FLUSH_THRESHOLD), run)
+
+
 def process_drive_folder_for_retagging(
     source_folder_id: str,
     dest_folder_id: str,
@@ -103,6 +979,9 @@ def process_drive_folder_for_retagging(
     min_confidence: float = 0.90,
     max_candidates: int = 5,
     max_uploads_per_run: int = 200,
+    workers: int = _DEFAULT_WORKERS,
+    max_drive_concurrency: int = _DEFAULT_MAX_DRIVE_CONCURRENCY,
+    force_reidentify: bool = False,
 ) -> Dict[str, int]:
     """
     Orchestrates:
@@ -115,166 +994,77 @@ def process_drive_folder_for_retagging(
       - apply local rename based on metadata before upload/update
       - upload updated file to destination Drive folder or update in place
 
-    Three outcomes:
-      1) No or low-confidence match: update file in place in source folder.
+    Up to ``workers`` files are in flight at once so that downloads and uploads of
+    different files overlap; identification itself runs one file at a time and
+    at most ``max_drive_concurrency`` uploads/updates hit Drive at once.
+
+    Files whose tags already name a MusicBrainz recording skip identification when
+    the Drive service is reachable: they are marked, renamed from their tags and
+    moved with a metadata-only Drive update (no re-upload, no delete); pass
+    ``force_reidentify=True`` to fingerprint them anyway. Files left in place by an earlier run are remembered by
+    content hash and skipped until they change; ``force_reidentify=True`` retries
+    them too.
+
+    Four outcomes:
+      1) No or low-confidence match: update file in place in source folder (only
+         when tags were written; otherwise the content is left untouched).
       2) High-confidence match: upload to destination folder and delete source file.
       3) Metadata present: tags written and local rename applied before upload or update.
+      4) Recording MBID already in the tags: moved (or marked, when dest is source)
+         and renamed on Drive without rewriting the file. Their tags, including the
+         VirtualDJ-compatible year frames, are left as they are; use
+         ``force_reidentify=True`` to retag them.
 
     Returns summary:
-      {"scanned": int, "downloaded": int, "identified": int, "tagged": int, "uploaded": int, "failed": int}
+      {"scanned": int, "downloaded": int, "identified": int, "tagged": int, "uploaded": int, "failed": int, "deleted": int, "skipped": int, "delete_failed": int}
+
+    Files moved by an earlier run carry a ``retagged_mbid`` app property (when the
+    Drive service is reachable) and are counted as skipped without downloading.
     """
     g = GoogleAPI.from_env()
+    workers = max(1, int(workers))
 
-    policy = IdentificationPolicy(
-        min_confidence=min_confidence,
-        max_candidates=max_candidates,
-        fetch_metadata_min_confidence=min_confidence,
-    )
+    min_confidence = float(min_confidence)
+    identifier = _get_identifier(acoustid_api_key, min_confidence, int(max_candidates))
 
-    identifier = Mp3Identifier.from_env(
-        acoustid_api_key=acoustid_api_key, policy=policy
-    )
-    tagger = Mp3Tagger()
-    renamer = Mp3Renamer()
-
-    summary = {
-        "scanned": 0,
-        "downloaded": 0,
-        "identified": 0,
-        "tagged": 0,
-        "uploaded": 0,
-        "failed": 0,
-        "deleted": 0,
-    }
+    summary = _Summary()
 
     music_files = _list_music_files(g, source_folder_id)
     log.info(
-        f"[START] Found {len(music_files)} music files in source folder (max uploads per run={max_uploads_per_run})."
+        f"[START] Found {len(music_files)} music files in source folder (max uploads per run={max_uploads_per_run}, workers={workers})."
     )
 
-    for file in music_files:
-        if (
-            max_uploads_per_run
-            and max_uploads_per_run > 0
-            and summary["uploaded"] >= max_uploads_per_run
-        ):
-            log.info(
-                f"[STOP] Reached max uploads per run ({max_uploads_per_run}). Stopping."
-            )
-            break
-
-        summary["scanned"] += 1
-        file_id = getattr(file, "id", None)
-        name = getattr(file, "name", "unknown")
-
-        if not file_id:
-            log.info(f"[SKIP] Missing file id for {name!r}; skipping.")
-            continue
-
-        temp_path = os.path.join(tempfile.gettempdir(), f"{file_id}_{name}")
-
+    # Every temp file of the run lives under one directory, which is removed on
+    # exit even if a worker's own cleanup was skipped.
+    with tempfile.TemporaryDirectory(
+        prefix="kat_", dir=_work_root_parent()
+    ) as work_root:
+        run = _RetagRun(
+            source_folder_id=source_folder_id,
+            dest_folder_id=dest_folder_id,
+            min_confidence=min_confidence,
+            max_uploads_per_run=max_uploads_per_run,
+            identifier=identifier,
+            tagger=_get_tagger(),
+            renamer=_get_renamer(),
+            summary=summary,
+            work_root=work_root,
+            drive_write_slots=threading.Semaphore(max(1, int(max_drive_concurrency))),
+            force_reidentify=force_reidentify,
+        )
+        # Originals of files already uploaded must still be deleted (and the
+        # summary logged) if the pool itself fails part-way through.
         try:
-            log.info(f"[DOWNLOAD] {name} ({file_id}) -> {temp_path}")
-            g.drive.download_file(file_id, temp_path)
-            summary["downloaded"] += 1
-
-            # Print existing tags
-            log.info("[PRE-EXISTING-TAGS]------------------")
-            _print_all_tags(tagger, temp_path)
-
-            # Identify
-            id_result = identifier.identify(temp_path, fetch_metadata=True)
-
-            # Log identification summary
-            candidates = getattr(id_result, "candidates", [])
-            num_candidates = len(candidates) if candidates else 0
-            chosen = getattr(id_result, "chosen", None)
-            chosen_summary = _format_candidate_summary(chosen) if chosen else "None"
-            metadata_present = bool(getattr(id_result, "metadata", None))
-            log.info(
-                f"[IDENTIFY] candidates={num_candidates}, chosen=({chosen_summary}), metadata_fetched={metadata_present}"
-            )
-
-            chosen_conf = (
-                float(getattr(chosen, "confidence", 0.0)) if chosen is not None else 0.0
-            )
-            identified = chosen is not None and chosen_conf >= float(min_confidence)
-
-            # Tag + rename only when we have metadata (metadata fetch is policy-gated)
-            path_out = temp_path
-            desired_filename = os.path.basename(temp_path)
-
-            if id_result.metadata:
-                metadata_summary = _format_metadata_summary(id_result.metadata)
-                log.info(
-                    f"[TAGGING] confidence={chosen_conf:.3f}, metadata=({metadata_summary})"
-                )
-                tagger.write(path_out, id_result.metadata, ensure_virtualdj_compat=True)
-                log.info("[TAGGING-DONE]")
-                _print_all_tags(tagger, temp_path)
-                summary["tagged"] += 1
-
-                # Rename in-place (local path only)
-                rename_result = renamer.apply(path_out, metadata=id_result.metadata)
-                old_basename = os.path.basename(path_out)
-                path_out = rename_result.dest_path
-                desired_filename = rename_result.dest_name
-                new_basename = os.path.basename(path_out)
-                log.info(f"[RENAME] {old_basename} -> {new_basename}")
-
-            if not identified:
-                # Update-in-place scenarios: no candidates or low confidence
-                if chosen is None:
-                    reason = "no_candidates"
-                else:
-                    reason = f"low_confidence:{chosen_conf:.3f}"
-
-                log.info(
-                    f"[DECISION] update_in_place reason={reason} chosen_conf={chosen_conf:.3f}"
-                )
-                g.drive.update_file(file_id, path_out)
-                summary["uploaded"] += 1
+            _run_pool(g, run, music_files, workers)
+        finally:
+            if run.upload_budget_exhausted():
                 log.info(
-                    f"[UPLOAD-SOURCE] Updated in place file_id={file_id} ({name}) reason={reason}"
+                    f"[STOP] Reached max uploads per run ({max_uploads_per_run}). Stopping."
                 )
-                continue
-
-            summary["identified"] += 1
-
-            # Identified with sufficient confidence: upload to destination and delete original.
-            log.info(
-                f"[DECISION] move_to_dest chosen_conf={chosen_conf:.3f} dest_folder_id={dest_folder_id}"
-            )
-            g.drive.upload_file(
-                path_out,
-                parent_id=dest_folder_id,
-                dest_name=desired_filename,
-            )
-            summary["uploaded"] += 1
-            log.info(f"[UPLOAD] {desired_filename} -> dest_folder_id={dest_folder_id}")
 
-            g.drive.delete_file(file_id)
-            summary["deleted"] += 1
-            log.info(f"[DELETE] Deleted source file_id={file_id} ({name})")
+            _flush_deletes(g, run.take_pending_deletes(), run)
 
-        except Exception as e:
-            summary["failed"] += 1
-            log.error(f"[ERROR] {name} ({file_id}): {e}", exc_info=True)
-        finally:
-            # Best-effort cleanup
-            try:
-                paths = {temp_path}
-                try:
-                    if "path_out" in locals() and path_out and path_out != temp_path:
-                        paths.add(path_out)
-                except Exception:
-                    pass
-
-                for p in paths:
-                    if p and os.path.exists(p):
-                        os.remove(p)
-            except Exception:
-                pass
+            log.info(f"[DONE] Summary: {asdict(summary)}")
+            log.info(f"[DONE] Timings: {run.format_timings()}")
 
-    log.info(f"[DONE] Summary: {summary}")
-    return summary
+    return asdict(summary)
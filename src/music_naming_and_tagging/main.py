@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+import os
+
 from music_naming_and_tagging.drive_retagger import process_drive_folder_for_retagging
 
 
@@ -16,14 +18,14 @@ def main() -> None:
 
     source_folder_id = "1hDFTDOavXDtJN-MR-ruqqapMaXGp4mB6"
     dest_folder_id = source_folder_id  # "1fL4Q4S1WUefC1QhHIsLuj3_DU1ZZBm_4"
-    acoustid_api_key = "R1yQzNHear"
+    acoustid_api_key = os.environ.get("ACOUSTID_API_KEY", "")
     if not source_folder_id or not dest_folder_id or not acoustid_api_key:
         raise RuntimeError(
             "Missing required configuration. Set env vars MUSIC_UPLOAD_SOURCE_FOLDER_ID, "
             "MUSIC_TAGGING_OUTPUT_FOLDER_ID, ACOUSTID_API_KEY (or define them in kaiano.config)."
         )
 
-    max_uploads_per_run = 200
+    max_uploads_per_run = int(os.environ.get("MAX_UPLOADS_PER_RUN") or 200)
     process_drive_folder_for_retagging(
         source_folder_id,
         dest_folder_id,
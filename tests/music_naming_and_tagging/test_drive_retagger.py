@@ -0,0 +1,426 @@
+import dataclasses
+import json
+import os
+import threading
+from types import SimpleNamespace
+
+import httplib2
+import pytest
+from googleapiclient.errors import HttpError
+
+from music_naming_and_tagging import drive_retagger
+
+
+def _http_error(status, reason=None, retry_after=None):
+    headers = {"status": status}
+    if retry_after is not None:
+        headers["retry-after"] = retry_after
+    errors = [{"reason": reason}] if reason else []
+    content = json.dumps({"error": {"code": status, "errors": errors}}).encode()
+    return HttpError(httplib2.Response(headers), content)
+
+
+class _Flaky:
+    """Callable that raises the given errors in turn, then returns "ok"."""
+
+    def __init__(self, *errors):
+        self.errors = list(errors)
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return "ok"
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    slept = []
+    monkeypatch.setattr(drive_retagger.time, "sleep", slept.append)
+    return slept
+
+
+@pytest.mark.parametrize(
+    "error",
+    [
+        _http_error(429),
+        _http_error(403, "userRateLimitExceeded"),
+        _http_error(403, "rateLimitExceeded"),
+        _http_error(503),
+    ],
+)
+def test_retry_repeats_transient_errors(sleeps, error):
+    call = _Flaky(error)
+    assert drive_retagger._retry(call) == "ok"
+    assert call.calls == 2
+    assert len(sleeps) == 1
+
+
+@pytest.mark.parametrize(
+    "error",
+    [
+        _http_error(403, "insufficientFilePermissions"),
+        _http_error(403, "storageQuotaExceeded"),
+        _http_error(404, "notFound"),
+    ],
+)
+def test_retry_raises_permanent_errors_immediately(sleeps, error):
+    call = _Flaky(error)
+    with pytest.raises(HttpError):
+        drive_retagger._retry(call)
+    assert call.calls == 1
+    assert sleeps == []
+
+
+def test_retry_does_not_repeat_server_errors_for_non_idempotent_calls(sleeps):
+    call = _Flaky(_http_error(500))
+    with pytest.raises(HttpError):
+        drive_retagger._retry(call, idempotent=False)
+    assert call.calls == 1
+
+
+def test_retry_repeats_rate_limits_for_non_idempotent_calls(sleeps):
+    call = _Flaky(_http_error(429))
+    assert drive_retagger._retry(call, idempotent=False) == "ok"
+
+
+def test_retry_clamps_retry_after_to_cap(sleeps):
+    call = _Flaky(_http_error(429, retry_after="3600"))
+    drive_retagger._retry(call, cap=30.0)
+    assert sleeps == [30.0]
+
+
+def test_retry_gives_up_after_attempts(sleeps):
+    call = _Flaky(*[_http_error(503) for _ in range(3)])
+    with pytest.raises(HttpError):
+        drive_retagger._retry(call, attempts=3)
+    assert call.calls == 3
+    assert len(sleeps) == 2
+
+
+_MBID = "6a3c3e1b-7d0f-4c53-9a6c-1f2b3c4d5e6f"
+
+
+@pytest.mark.parametrize(
+    "tags",
+    [
+        {"musicbrainz_trackid": _MBID},
+        {"musicbrainz_recordingid": _MBID},
+        {"TXXX:MusicBrainz Track Id": _MBID},
+        {"MUSICBRAINZ_TRACKID": _MBID.upper()},
+        {"musicbrainz_trackid": f"  {_MBID}\n"},
+    ],
+)
+def test_existing_recording_mbid_finds_recording_id(tags):
+    assert drive_retagger._existing_recording_mbid(tags) == _MBID
+
+
+@pytest.mark.parametrize(
+    "tags",
+    [
+        {},
+        {"musicbrainz_trackid": None},
+        {"musicbrainz_trackid": ""},
+        {"musicbrainz_trackid": "not-an-mbid"},
+        {"musicbrainz_trackid": _MBID[:-1]},
+        {"musicbrainz_trackid": f"{_MBID}, {_MBID}"},
+        # Release-track and release ids are not recording ids.
+        {"musicbrainz_releasetrackid": _MBID},
+        {"TXXX:MusicBrainz Album Id": _MBID},
+    ],
+)
+def test_existing_recording_mbid_ignores_other_values(tags):
+    assert drive_retagger._existing_recording_mbid(tags) == ""
+
+
+def test_written_fields_lists_populated_values_without_raw():
+    @dataclasses.dataclass
+    class Metadata:
+        title: str = "T"
+        artist: str = "A"
+        album: str | None = None
+        year: str = ""
+        raw: dict = dataclasses.field(default_factory=lambda: {"big": "payload"})
+
+    expected = {"title": "T", "artist": "A"}
+    assert drive_retagger._written_fields(Metadata()) == expected
+    plain = SimpleNamespace(title="T", artist="A", album=None, raw={})
+    assert drive_retagger._written_fields(plain) == expected
+
+
+class _FacadeDrive:
+    """Drive facade without ``_service``; ``list_files`` honours ``mime_type``."""
+
+    def __init__(self, items, mime_types):
+        self.items = items
+        self.mime_types = mime_types
+        self.queries = []
+
+    def list_files(self, parent_id, mime_type=None, trashed=None):
+        self.queries.append(mime_type)
+        return [
+            f
+            for f in self.items
+            if mime_type is None or self.mime_types[f.id] == mime_type
+        ]
+
+
+_FOLDER_MIME_TYPES = {
+    "song": "audio/mpeg",
+    "notes": "text/plain",
+    "sub": "application/vnd.google-apps.folder",
+}
+
+
+def test_list_music_files_filters_facade_listing_by_mime_type():
+    items = [SimpleNamespace(id=i, mimeType=mt) for i, mt in _FOLDER_MIME_TYPES.items()]
+    drive = _FacadeDrive(items, _FOLDER_MIME_TYPES)
+    files = drive_retagger._list_music_files(SimpleNamespace(drive=drive), "folder")
+    assert [f.id for f in files] == ["song"]
+    assert drive.queries == [None]
+
+
+def test_list_music_files_lets_drive_filter_when_items_lack_mime_type():
+    items = [SimpleNamespace(id=i) for i in _FOLDER_MIME_TYPES]
+    drive = _FacadeDrive(items, _FOLDER_MIME_TYPES)
+    files = drive_retagger._list_music_files(SimpleNamespace(drive=drive), "folder")
+    assert [f.id for f in files] == ["song"]
+
+
+def _make_run(tmp_path, **overrides):
+    values = dict(
+        source_folder_id="src",
+        dest_folder_id="dst",
+        min_confidence=0.9,
+        max_uploads_per_run=0,
+        identifier=None,
+        tagger=None,
+        renamer=None,
+        summary=drive_retagger._Summary(),
+        work_root=str(tmp_path),
+        drive_write_slots=threading.Semaphore(1),
+    )
+    values.update(overrides)
+    return drive_retagger._RetagRun(**values)
+
+
+class _BatchService:
+    """Drive service stub for batched deletes.
+
+    ``throttled`` maps a file id to how many times its delete is rate limited
+    before it succeeds; ids in ``missing`` fail with a permanent 404.
+    """
+
+    def __init__(self, throttled=None, missing=()):
+        self.throttled = dict(throttled or {})
+        self.missing = set(missing)
+        self.batch_sizes = []
+        self.deleted = []
+
+    def files(self):
+        return self
+
+    def delete(self, fileId, supportsAllDrives):
+        return fileId
+
+    def new_batch_http_request(self, callback):
+        return _Batch(self, callback)
+
+
+class _Batch:
+    def __init__(self, service, callback):
+        self.service = service
+        self.callback = callback
+        self.ids = []
+
+    def add(self, request, request_id):
+        self.ids.append(request_id)
+
+    def execute(self):
+        service = self.service
+        service.batch_sizes.append(len(self.ids))
+        for fid in self.ids:
+            if service.throttled.get(fid, 0) > 0:
+                service.throttled[fid] -= 1
+                self.callback(fid, None, _http_error(403, "rateLimitExceeded"))
+            elif fid in service.missing:
+                self.callback(fid, None, _http_error(404, "notFound"))
+            else:
+                service.deleted.append(fid)
+                self.callback(fid, {}, None)
+
+
+def _delete(tmp_path, service, file_ids):
+    run = _make_run(tmp_path)
+    g = SimpleNamespace(drive=SimpleNamespace(_service=service))
+    drive_retagger._delete_files(g, file_ids, run)
+    return run.summary
+
+
+def test_delete_files_sends_at_most_100_per_batch(tmp_path, sleeps):
+    service = _BatchService()
+    summary = _delete(tmp_path, service, [f"id{i}" for i in range(250)])
+    assert service.batch_sizes == [100, 100, 50]
+    assert len(service.deleted) == 250
+    assert (summary.deleted, summary.delete_failed) == (250, 0)
+
+
+def test_delete_files_resends_rate_limited_items(tmp_path, sleeps):
+    service = _BatchService(throttled={"b": 2})
+    summary = _delete(tmp_path, service, ["a", "b", "c"])
+    assert service.batch_sizes == [3, 1, 1]
+    assert sorted(service.deleted) == ["a", "b", "c"]
+    assert (summary.deleted, summary.delete_failed) == (3, 0)
+    assert len(sleeps) == 2
+
+
+def test_delete_files_counts_items_still_limited_on_last_attempt(tmp_path, sleeps):
+    service = _BatchService(throttled={"b": 100})
+    summary = _delete(tmp_path, service, ["a", "b"])
+    assert service.batch_sizes == [2, 1, 1, 1, 1, 1]
+    assert (summary.deleted, summary.delete_failed) == (1, 1)
+
+
+def test_delete_files_does_not_resend_permanent_failures(tmp_path, sleeps):
+    service = _BatchService(missing={"b"})
+    summary = _delete(tmp_path, service, ["a", "b"])
+    assert service.batch_sizes == [2]
+    assert (summary.deleted, summary.delete_failed) == (1, 1)
+
+
+class _RecordingService:
+    """Drive service stub recording files().create/update calls."""
+
+    def __init__(self):
+        self.calls = []
+
+    def files(self):
+        return self
+
+    def create(self, **kwargs):
+        self.calls.append(("create", kwargs))
+        return SimpleNamespace(execute=lambda: {"id": "new"})
+
+    def update(self, **kwargs):
+        self.calls.append(("update", kwargs))
+        return SimpleNamespace(execute=lambda: {"id": kwargs["fileId"]})
+
+
+class _FakeDrive:
+    def __init__(self, service=None):
+        if service is not None:
+            self._service = service
+        self.downloads = []
+        self.uploads = []
+
+    def download_file(self, file_id, path):
+        self.downloads.append(file_id)
+        with open(path, "wb") as fh:
+            fh.write(b"audio")
+
+    def upload_file(self, path, parent_id, dest_name):
+        self.uploads.append((parent_id, dest_name))
+
+    def update_file(self, file_id, path):
+        self.uploads.append((file_id, None))
+
+
+class _FakeIdentifier:
+    """Identifies nothing; records which files it was asked about."""
+
+    def __init__(self):
+        self.calls = []
+
+    def identify(self, path, fetch_metadata):
+        self.calls.append(os.path.basename(path))
+        return SimpleNamespace(candidates=[], chosen=None, metadata=None)
+
+
+def _process(tmp_path, monkeypatch, file, *, service=None, tags=None, **run_kwargs):
+    """Run _process_one on ``file`` against fakes; returns (run, drive)."""
+    drive = _FakeDrive(service)
+    monkeypatch.setattr(
+        drive_retagger, "_thread_google_api", lambda: SimpleNamespace(drive=drive)
+    )
+    renamed = SimpleNamespace(dest_path=None, dest_name="Artist - Title.mp3")
+    run = _make_run(
+        tmp_path,
+        identifier=_FakeIdentifier(),
+        tagger=SimpleNamespace(dump=lambda path: dict(tags or {}), write=None),
+        renamer=SimpleNamespace(apply=lambda path, metadata: renamed),
+        **run_kwargs,
+    )
+    drive_retagger._process_one(run, file)
+    return run, drive
+
+
+_PRETAGGED = {"tracktitle": "Title", "artist": "Artist", "musicbrainz_trackid": _MBID}
+
+
+def test_pretagged_file_is_moved_with_a_metadata_only_update(tmp_path, monkeypatch):
+    service = _RecordingService()
+    file = SimpleNamespace(id="f1", name="old.mp3")
+    run, drive = _process(tmp_path, monkeypatch, file, service=service, tags=_PRETAGGED)
+    [(method, kwargs)] = service.calls
+    assert method == "update" and "media_body" not in kwargs
+    assert kwargs["addParents"] == "dst" and kwargs["removeParents"] == "src"
+    assert kwargs["body"] == {
+        "appProperties": {"retagged_mbid": _MBID},
+        "name": "Artist - Title.mp3",
+    }
+    assert (run.summary.identified, run.summary.uploaded) == (1, 0)
+    assert run.pending_deletes == [] and run.uploads_reserved == 0
+
+
+def test_pretagged_file_is_identified_normally_without_drive_service(
+    tmp_path, monkeypatch
+):
+    file = SimpleNamespace(id="f1", name="old.mp3")
+    run, drive = _process(tmp_path, monkeypatch, file, tags=_PRETAGGED)
+    assert run.identifier.calls == ["old.mp3"]
+    # Unidentified and untagged, so nothing is written back through the facade.
+    assert drive.uploads == []
+
+
+def _checked(md5):
+    return SimpleNamespace(
+        id="f1",
+        name="old.mp3",
+        md5Checksum=md5,
+        appProperties={"retag_checked_md5": "abc"},
+    )
+
+
+def test_file_unchanged_since_last_check_is_skipped(tmp_path, monkeypatch):
+    run, drive = _process(tmp_path, monkeypatch, _checked("abc"))
+    assert run.summary.skipped == 1
+    assert drive.downloads == []
+
+
+def test_file_changed_since_last_check_is_processed(tmp_path, monkeypatch):
+    run, drive = _process(tmp_path, monkeypatch, _checked("def"))
+    assert run.summary.skipped == 0
+    assert drive.downloads == ["f1"]
+
+
+def test_force_reidentify_ignores_checked_marker(tmp_path, monkeypatch):
+    run, drive = _process(tmp_path, monkeypatch, _checked("abc"), force_reidentify=True)
+    assert run.summary.skipped == 0
+    assert drive.downloads == ["f1"]
+
+
+def test_unidentified_untagged_file_is_only_marked_checked(tmp_path, monkeypatch):
+    def no_update(*args, **kwargs):
+        raise AssertionError("unchanged file was re-uploaded")
+
+    monkeypatch.setattr(drive_retagger, "_update_file", no_update)
+    service = _RecordingService()
+    file = SimpleNamespace(id="f1", name="old.mp3", md5Checksum="abc")
+    run, drive = _process(tmp_path, monkeypatch, file, service=service)
+    [(method, kwargs)] = service.calls
+    assert method == "update" and "media_body" not in kwargs
+    assert kwargs["body"] == {"appProperties": {"retag_checked_md5": "abc"}}
+    assert drive.uploads == []
+    assert (run.summary.uploaded, run.summary.failed) == (0, 0)
+    assert run.uploads_reserved == 0